@@ -37,15 +37,234 @@ try:
     import os
     import pygame
     import time
-    import threading
-    import queue
     import random
     import numpy as np
-    import copy
+    import array
+    import ctypes
+    try:
+        import numba
+    except ImportError:
+        numba = None
 
     pygame.mixer.init(buffer = 256)
     beep = pygame.mixer.Sound(file = r'sounds\200.wav')
 
+    if numba is not None:
+
+        @numba.njit(cache = True)
+        def run_cycles_jit(mem, V, STACK, DISPLAY, KEYS, state, NumberOfCycles):
+            """
+            Compiled equivalent of Chip8.emulateCycle, run NumberOfCycles times.
+
+            The arrays share their memory with the Chip8 attributes of the same name,
+            state holds [PC, I, SP, DT, ST] and is updated in place.
+            Memory, stack and key indexes are masked so that the buffers are never overrun.
+            Returns False if an unknown opcode stopped the execution, with PC right after it,
+            or if PC left the memory.
+            """
+            PC = state[0]
+            I = state[1]
+            SP = state[2]
+            DT = state[3]
+            ST = state[4]
+            bKnownOpcodes = True
+            
+            for _ in range(NumberOfCycles):
+            
+                if PC < 0 or PC >= 0xFFF:
+                    bKnownOpcodes = False
+                    break
+                
+                w = (np.int64(mem[PC]) << 8) + mem[PC+1]
+                
+                n3 = (w & 0xF000) >> 12
+                x = (w & 0x0F00) >> 8
+                y = (w & 0x00F0) >> 4
+                n = w & 0x000F
+                kk = w & 0x00FF
+                nnn = w & 0x0FFF
+                
+                # PC points to the next instruction while the opcode executes
+                PC += 2
+                
+                if n3 == 0x0:
+                    if nnn == 0x0E0:
+                        # 00E0 - CLS
+                        DISPLAY[:] = 0
+                    elif nnn == 0x0EE:
+                        # 00EE - RET
+                        PC = STACK[SP & 0xF]
+                        SP -= 1
+                    # 0nnn - SYS addr is ignored
+                elif n3 == 0x1:
+                    # 1nnn - JP addr
+                    PC = nnn
+                elif n3 == 0x2:
+                    # 2nnn - CALL addr
+                    SP += 1
+                    STACK[SP & 0xF] = PC
+                    PC = nnn
+                elif n3 == 0x3:
+                    # 3xkk - SE Vx, byte
+                    if V[x] == kk:
+                        PC += 2
+                elif n3 == 0x4:
+                    # 4xkk - SNE Vx, byte
+                    if V[x] != kk:
+                        PC += 2
+                elif n3 == 0x6:
+                    # 6xkk - LD Vx, byte
+                    V[x] = kk
+                elif n3 == 0x7:
+                    # 7xkk - ADD Vx, byte
+                    V[x] = (V[x] + kk) & 0xFF
+                elif n3 == 0x8 and n == 0x0:
+                    # 8xy0 - LD Vx, Vy
+                    V[x] = V[y]
+                elif n3 == 0x8 and n == 0x2:
+                    # 8xy2 - AND Vx, Vy
+                    V[x] &= V[y]
+                elif n3 == 0x8 and n == 0x3:
+                    # 8xy3 - XOR Vx, Vy
+                    V[x] ^= V[y]
+                elif n3 == 0x8 and n == 0x4:
+                    # 8xy4 - ADD Vx, Vy
+                    sum = np.int64(V[x]) + V[y]
+                    if sum > 0xFF:
+                        V[0xF] = 1
+                    else:
+                        V[0xF] = 0
+                    V[x] = sum & 0xFF
+                elif n3 == 0x8 and n == 0x5:
+                    # 8xy5 - SUB Vx, Vy
+                    if V[x] > V[y]:
+                        V[0xF] = 1
+                    else:
+                        V[0xF] = 0
+                    V[x] = (np.int64(V[x]) - V[y]) & 0xFF
+                elif n3 == 0x8 and n == 0x6:
+                    # 8xy6 - SHR Vx {, Vy}
+                    if V[x] & 0x1 == 1:
+                        V[0xF] = 1
+                    else:
+                        V[0xF] = 0
+                    V[x] >>= 1
+                elif n3 == 0xA:
+                    # Annn - LD I, addr
+                    I = nnn
+                elif n3 == 0xC:
+                    # Cxkk - RND Vx, byte
+                    V[x] = np.random.randint(0, 0x100) & kk
+                elif n3 == 0xD:
+                    # Dxyn - DRW Vx, Vy, nibble
+                    Vx = np.uint64(V[x] & 0x3F)
+                    Vy = V[y]
+                    collision = np.uint64(0)
+                    for sprite_byte_index in range(n):
+                        if I + sprite_byte_index > 0xFFF:
+                            break
+                        # rotate the sprite byte right from the leftmost pixels, wrapping around
+                        mask = np.uint64(mem[I+sprite_byte_index]) << np.uint64(56)
+                        if Vx:
+                            mask = (mask >> Vx) | (mask << (np.uint64(64) - Vx))
+                        row = (Vy + sprite_byte_index) & 0x1F
+                        # remember if any pixel is erased
+                        collision |= DISPLAY[row] & mask
+                        DISPLAY[row] ^= mask
+                    V[0xF] = 1 if collision else 0
+                elif n3 == 0xE and kk == 0x9E:
+                    # Ex9E - SKP Vx
+                    if KEYS[V[x] & 0xF]:
+                        PC += 2
+                elif n3 == 0xE and kk == 0xA1:
+                    # ExA1 - SKNP Vx
+                    if not KEYS[V[x] & 0xF]:
+                        PC += 2
+                elif n3 == 0xF and kk == 0x07:
+                    # Fx07 - LD Vx, DT
+                    V[x] = DT
+                elif n3 == 0xF and kk == 0x0A:
+                    # Fx0A - LD Vx, K
+                    for k_ in range(16):
+                        if KEYS[k_]:
+                            V[x] = k_
+                            break
+                    else:
+                        # execute this instruction again on the next cycle
+                        PC -= 2
+                elif n3 == 0xF and kk == 0x15:
+                    # Fx15 - LD DT, Vx
+                    DT = V[x]
+                elif n3 == 0xF and kk == 0x18:
+                    # Fx18 - LD ST, Vx
+                    ST = V[x]
+                elif n3 == 0xF and kk == 0x1E:
+                    # Fx1E - ADD I, Vx
+                    I += V[x]
+                elif n3 == 0xF and kk == 0x33:
+                    # Fx33 - LD B, Vx
+                    hundreds, rest = divmod(V[x], 100)
+                    tens, ones = divmod(rest, 10)
+                    mem[(I  ) & 0xFFF] = hundreds
+                    mem[(I+1) & 0xFFF] = tens
+                    mem[(I+2) & 0xFFF] = ones
+                elif n3 == 0xF and kk == 0x65:
+                    # Fx65 - LD Vx, [I]
+                    for loc in range(x+1):
+                        V[loc] = mem[(I + loc) & 0xFFF]
+                else:
+                    bKnownOpcodes = False
+                    break
+            
+            state[0] = PC
+            state[1] = I
+            state[2] = SP
+            state[3] = DT
+            state[4] = ST
+            return bKnownOpcodes
+    else:
+        run_cycles_jit = None
+
+    # the native core takes the same arguments as run_cycles_jit and is preferred
+    # when it has been built with setup\core_build.bat
+    try:
+        chip8_core = ctypes.CDLL(os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            {True : 'chip8_core.dll', False : 'chip8_core.so'}[os.name == 'nt'],
+        ))
+    except OSError:
+        chip8_core = None
+    if chip8_core is not None:
+        run_cycles_native = chip8_core.chip8_run
+        run_cycles_native.argtypes = [
+            np.ctypeslib.ndpointer(np.uint8, flags = 'C_CONTIGUOUS'), # mem
+            np.ctypeslib.ndpointer(np.uint8, flags = 'C_CONTIGUOUS'), # V
+            np.ctypeslib.ndpointer(np.uint16, flags = 'C_CONTIGUOUS'), # STACK
+            np.ctypeslib.ndpointer(np.uint64, flags = 'C_CONTIGUOUS'), # DISPLAY
+            np.ctypeslib.ndpointer(np.uint8, flags = 'C_CONTIGUOUS'), # KEYS
+            np.ctypeslib.ndpointer(np.int64, flags = 'C_CONTIGUOUS'), # state
+            ctypes.c_int64, # NumberOfCycles
+        ]
+        run_cycles_native.restype = ctypes.c_int
+    else:
+        run_cycles_native = None
+
+    # compiled loop used by Chip8.runCycles, the pure Python dispatch runs without it
+    if run_cycles_native is not None:
+        run_cycles_compiled = run_cycles_native
+    else:
+        run_cycles_compiled = run_cycles_jit
+
+    # display row mask of every sprite byte, rotated right by Vx from the leftmost pixels,
+    # indexed [Vx][sprite_byte]
+    SPRITE_MASKS = tuple(
+        tuple(
+            (((sprite_byte << 56) >> Vx) | ((sprite_byte << 56) << (64 - Vx))) & 0xFFFFFFFFFFFFFFFF
+            for sprite_byte in range(256)
+        )
+        for Vx in range(64)
+    )
+
     class Chip8(object):
 
         def __init__(self, RomPath = None):
@@ -60,19 +279,19 @@ try:
                 rom_bytes +
                 bytearray((0x1000-len(rom_bytes)-0x200)*[0x00])
             )
-            self.V = {}
-            for i in range(16):
-                self.V[i] = 0x00
+            # the compiled cores work in place on a bytearray,
+            # plain Python indexes a list of ints faster
+            if run_cycles_compiled is not None:
+                self.V = bytearray(16)
+            else:
+                self.V = 16*[0x00]
 
-            self.KEYS = {}
-            for i in range(16):
-                self.KEYS[i] = False           
+            self.KEYS = bytearray(16)
                 
-            self.STACK = 16*[0x0000]
+            self.STACK = array.array('H', 16*[0x0000])
             
-            self.extra_w = 16
-            self.extra_h = 16
-            self.DISPLAY = np.array([[False]*(self.disp_w_px+self.extra_w)]*(self.disp_h_px+self.extra_h))
+            # one 64-bit word per row, leftmost pixel in the most significant bit
+            self.DISPLAY = array.array('Q', [0]*self.disp_h_px)
                 
             self.I = 0x00    
 
@@ -84,65 +303,111 @@ try:
             
             self.ST = 0x00
             self.bBeepPlaying = False
+            # the beep loops on its own channel, which is only paused and unpaused
+            self.BeepChannel = pygame.mixer.find_channel(True)
+            self.BeepChannel.play(beep, loops = -1)
+            self.BeepChannel.pause()
+            self.DtStTimeAccumulator = 0
             
-            self.EmulationThread = threading.Thread(target = self.runEmulationThread)
-            self.bEmulationThreadAbortQueue = queue.Queue()
+            # opcode handlers, indexed by the most significant nibble
+            self.DispatchTable = [
+                None, # 0x0 - see DispatchTable0
+                self.op_1nnn, # 0x1
+                self.op_2nnn, # 0x2
+                self.op_3xkk, # 0x3
+                self.op_4xkk, # 0x4
+                self.op_unknown, # 0x5
+                self.op_6xkk, # 0x6
+                self.op_7xkk, # 0x7
+                None, # 0x8 - see DispatchTable8
+                self.op_unknown, # 0x9
+                self.op_Annn, # 0xA
+                self.op_unknown, # 0xB
+                self.op_Cxkk, # 0xC
+                self.op_Dxyn, # 0xD
+                None, # 0xE - see DispatchTableE
+                None, # 0xF - see DispatchTableF
+            ]
+            # 0nnn family, indexed by nnn
+            self.DispatchTable0 = {
+                0x0E0 : self.op_00E0,
+                0x0EE : self.op_00EE,
+            }
+            # 8xyn family, indexed by n
+            self.DispatchTable8 = {
+                0x0 : self.op_8xy0,
+                0x2 : self.op_8xy2,
+                0x3 : self.op_8xy3,
+                0x4 : self.op_8xy4,
+                0x5 : self.op_8xy5,
+                0x6 : self.op_8xy6,
+            }
+            # Exkk family, indexed by kk
+            self.DispatchTableE = {
+                0x9E : self.op_Ex9E,
+                0xA1 : self.op_ExA1,
+            }
+            # Fxkk family, indexed by kk
+            self.DispatchTableF = {
+                0x07 : self.op_Fx07,
+                0x0A : self.op_Fx0A,
+                0x15 : self.op_Fx15,
+                0x18 : self.op_Fx18,
+                0x1E : self.op_Fx1E,
+                0x33 : self.op_Fx33,
+                0x65 : self.op_Fx65,
+            }
             
-            self.DtStThread = threading.Thread(target = self.runDtStThread)
-            self.bDtStThreadAbortQueue = queue.Queue()
+            # opcodes decoded once for every address, indexed by PC
+            self.DecodedMem = [self.decode(addr) for addr in range(len(self.mem)-1)]
         
-        def runEmulationThread(self):
+        def runCycles(self, NumberOfCycles):
         
-            ClockFrequency = 100000
-            TimeElapsed = 0
-            startTime = 0
-            while True:
-                
-                try:
-                    bEmulationThreadAbort = self.bEmulationThreadAbortQueue.get(block = False)
-                    if bEmulationThreadAbort:
-                        break
-                except queue.Empty:
-                    pass         
-                
-                TimeElapsed = time.perf_counter() - startTime
-                if TimeElapsed > ( 1/ClockFrequency ):
-                    startTime = time.perf_counter()
-                    self.emulateCycle()
-                else:
-                    time.sleep(1/ClockFrequency - TimeElapsed)    
-                    
-        def runDtStThread(self):
+            if run_cycles_compiled is None:
+                # same as emulateCycle, with the attribute lookups out of the loop
+                DecodedMem = self.DecodedMem
+                for _ in range(NumberOfCycles):
+                    handler, x, y, n, kk, nnn = DecodedMem[self.PC]
+                    self.PC += 2
+                    handler(x, y, n, kk, nnn)
+                return
+            
+            # the compiled loops work in place on the same buffers, which is only safe
+            # because they mask every memory, stack and key index;
+            # only the scalar registers are copied in and out
+            state = np.array([self.PC, self.I, self.SP, self.DT, self.ST], dtype = np.int64)
+            bKnownOpcodes = run_cycles_compiled(
+                np.frombuffer(self.mem, dtype = np.uint8),
+                np.frombuffer(self.V, dtype = np.uint8),
+                np.frombuffer(self.STACK, dtype = np.uint16),
+                np.frombuffer(self.DISPLAY, dtype = np.uint64),
+                np.frombuffer(self.KEYS, dtype = np.uint8),
+                state,
+                NumberOfCycles,
+            )
+            self.PC, self.I, self.SP, self.DT, self.ST = [int(val) for val in state]
+            if not bKnownOpcodes:
+                self.op_unknown(0, 0, 0, 0, 0)
         
-            ClockFrequency = 60
-            TimeElapsed = 0
-            startTime = time.perf_counter()
-            while True:
-                
-                try:
-                    bAbort = self.bDtStThreadAbortQueue.get(block = False)
-                    if bAbort:
-                        break
-                except queue.Empty:
-                    pass         
-                
-                TimeElapsed = time.perf_counter() - startTime
-                if TimeElapsed > ( 1/ClockFrequency ):
-                    startTime = time.perf_counter()
-                    self.decrement_DT_ST()
-                else:
-                    time.sleep(1/ClockFrequency - TimeElapsed)
+        def updateTimers(self, milliseconds):
+            """
+            Decrement DT and ST at 60 Hz, given the milliseconds elapsed since the last update.
+            """
+            self.DtStTimeAccumulator += milliseconds
+            while self.DtStTimeAccumulator >= 1000/60:
+                self.decrement_DT_ST()
+                self.DtStTimeAccumulator -= 1000/60
 
         def emulateCycle(self):
             
-            w = (self.mem[self.PC] << 8) + self.mem[self.PC+1]
+            handler, x, y, n, kk, nnn = self.DecodedMem[self.PC]
             
             ### DEBUG
             ### =====
-            # print("${:04X} {:04X}".format(self.PC, w))
+            # print("${:04X} {:04X}".format(self.PC, (self.mem[self.PC] << 8) + self.mem[self.PC+1]))
             # print(
                 # "V "+
-                # " ".join(["{:02X}".format(val) for key, val in self.V.items()])+
+                # " ".join(["{:02X}".format(val) for val in self.V])+
                 # "  I {:04X}".format(self.I)+
                 # "  DT {:02X}".format(self.DT)
             # )
@@ -152,6 +417,16 @@ try:
                 # "  SP {:02X}".format(self.SP)
             # )
             
+            # PC points to the next instruction while the opcode executes
+            self.PC += 2
+            handler(x, y, n, kk, nnn)
+
+        def decode(self, addr):
+            """
+            Split the opcode stored at addr into its handler and operands.
+            """
+            w = (self.mem[addr] << 8) + self.mem[addr+1]
+            
             n3 = (w & 0xF000) >> 12
             x = (w & 0x0F00) >> 8
             y = (w & 0x00F0) >> 4
@@ -159,313 +434,354 @@ try:
             kk = w & 0x00FF
             nnn = w & 0x0FFF
             
-            if ( n3 == 0x0 ) and ( nnn == 0x0E0 ):
-                """
-                00E0 - CLS
-                Clear the display.
-                """
-                self.DISPLAY = np.array([[False]*(self.disp_w_px+self.extra_w)]*(self.disp_h_px+self.extra_h))
-            elif ( n3 == 0x0 ) and (nnn != 0x0EE):
-                """
-                0nnn - SYS addr
-                Jump to a machine code routine at nnn.
-
-                This instruction is only used on the old computers on which Chip-8 was originally implemented. It is ignored by modern interpreters.
-                """
-                pass    
-            elif ( n3 == 0x0 ) and (nnn == 0x0EE):
-                """
-                00EE - RET
-                Return from a subroutine.
-
-                The interpreter sets the program counter to the address at the top of the stack, then subtracts 1 from the stack pointer.
-                """
-                self.PC = self.STACK[self.SP]
-                self.SP -= 1
-            elif ( n3 == 0x1 ):
-                """
-                1nnn - JP addr
-                Jump to location nnn.
-                
-                The interpreter sets the program counter to nnn.
-                """
-                self.PC = nnn
-                return
-            elif ( n3 == 0x2 ):
-                """
-                2nnn - CALL addr
-                Call subroutine at nnn.
-
-                The interpreter increments the stack pointer, then puts the current PC on the top of the stack. The PC is then set to nnn.
-                """
-                self.SP += 1
-                self.STACK[self.SP] = self.PC
-                self.PC = nnn
-                return
-            elif ( n3 == 0x3 ):
-                """
-                3xkk - SE Vx, byte
-                Skip next instruction if Vx = kk.
-
-                The interpreter compares register Vx to kk, and if they are equal, increments the program counter by 2.
-                """
-                if self.V[x] == kk:
-                    self.PC += 2       
-            elif ( n3 == 0x4 ):
-                """
-                4xkk - SNE Vx, byte
-                Skip next instruction if Vx != kk.
-
-                The interpreter compares register Vx to kk, and if they are not equal, increments the program counter by 2.
-                """
-                if self.V[x] != kk:
-                    self.PC += 2       
-            elif ( n3 == 0x6 ):
-                """
-                6xkk - LD Vx, byte
-                Set Vx = kk.
-                
-                The interpreter puts the value kk into register Vx.
-                """
-                self.V[x] = kk
-            elif ( n3 == 0x7 ):
-                """
-                7xkk - ADD Vx, byte
-                Set Vx = Vx + kk.
-
-                Adds the value kk to the value of register Vx, then stores the result in Vx. 
-                """
-                self.V[x] = (self.V[x] + kk) & 0xFF
-            elif ( n3 == 0x8 ) and ( n == 0x0 ):
-                """
-                8xy0 - LD Vx, Vy
-                Set Vx = Vy.
-
-                Stores the value of register Vy in register Vx.
-                """
-                self.V[x] = self.V[y]
-            elif ( n3 == 0x8 ) and ( n == 0x2 ):
-                """
-                8xy2 - AND Vx, Vy
-                Set Vx = Vx AND Vy.
-
-                Performs a bitwise AND on the values of Vx and Vy, then stores the result in Vx. A bitwise AND compares the corrseponding bits from two values, and if both bits are 1, then the same bit in the result is also 1. Otherwise, it is 0.
-                """
-                self.V[x] &= self.V[y]
-            elif ( n3 == 0x8 ) and ( n == 0x3 ):
-                """
-                8xy3 - XOR Vx, Vy
-                Set Vx = Vx XOR Vy.
-
-                Performs a bitwise exclusive OR on the values of Vx and Vy, then stores the result in Vx. An exclusive OR compares the corrseponding bits from two values, and if the bits are not both the same, then the corresponding bit in the result is set to 1. Otherwise, it is 0.
-                """
-                self.V[x] ^= self.V[y]
-            elif ( n3 == 0x8 ) and ( n == 0x4 ):
-                """
-                8xy4 - ADD Vx, Vy
-                Set Vx = Vx + Vy, set VF = carry.
-
-                The values of Vx and Vy are added together. If the result is greater than 8 bits (i.e., > 255,) VF is set to 1, otherwise 0. Only the lowest 8 bits of the result are kept, and stored in Vx.
-                """
-                sum = self.V[x] + self.V[y]
-                if sum > 0xFF:
-                    self.V[0xF] = 1
-                else:
-                    self.V[0xF] = 0                
-                self.V[x] = sum & 0xFF
-            elif ( n3 == 0x8 ) and ( n == 0x5 ):
-                """
-                8xy5 - SUB Vx, Vy
-                Set Vx = Vx - Vy, set VF = NOT borrow.
-
-                If Vx > Vy, then VF is set to 1, otherwise 0. Then Vy is subtracted from Vx, and the results stored in Vx.
-                """
-                if self.V[x] > self.V[y]:
-                    self.V[0xF] = 1
-                else:
-                    self.V[0xF] = 0               
-                self.V[x] = (self.V[x] - self.V[y]) & 0xFF
-            elif ( n3 == 0x8 ) and ( n == 0x6 ):
-                """
-                8xy6 - SHR Vx {, Vy}
-                Set Vx = Vx SHR 1.
-
-                If the least-significant bit of Vx is 1, then VF is set to 1, otherwise 0. Then Vx is divided by 2.
-                """
-                if self.V[x] & 0x1 == 1:
-                    self.V[0xF] = 1
-                else:
-                    self.V[0xF] = 0
-                   
-                self.V[x] >>= 1
-            elif ( n3 == 0xA ):
-                """
-                Annn - LD I, addr
-                Set I = nnn.
-                
-                The value of register I is set to nnn.
-                """
-                self.I = nnn
-            elif ( n3 == 0xC ):
-                """
-                Cxkk - RND Vx, byte
-                Set Vx = random byte AND kk.
-
-                The interpreter generates a random number from 0 to 255,
-                which is then ANDed with the value kk.
-                The results are stored in Vx.
-                See instruction 8xy2 for more information on AND.
-                """
-                rr = random.randint(0, 0xFF)
-                self.V[x] = rr & kk
-            elif ( n3 == 0xD ):
-                """
-                Dxyn - DRW Vx, Vy, nibble
-                Display n-byte sprite starting at memory location I at (Vx, Vy), set VF = collision.
-
-                The interpreter reads n bytes from memory, starting at the address stored in I.
-                These bytes are then displayed as sprites on screen at coordinates (Vx, Vy).
-                Sprites are XORed onto the existing screen. If this causes any pixels to be erased, VF is set to 1, otherwise it is set to 0.
-                If the sprite is positioned so part of it is outside the coordinates of the display, it wraps around to the opposite side of the screen.
-                See instruction 8xy3 for more information on XOR, and section 2.4, Display, for more information on the Chip-8 screen and sprites.
-                """
-                Vx = self.V[x]
-                Vy = self.V[y]
-                sprite_byte_list = self.mem[self.I:self.I+n]
-                self.V[0xF] = 0
-                w, h = self.disp_w_px, self.disp_h_px
-                sprite_w = 8
-                
-                # remember current display
-                DISPLAY_OLD = copy.copy(self.DISPLAY)
-                # print sprites
-                def print_sprites(sprite_byte_list, Vx, Vy):
-                    for sprite_byte_index, sprite_byte in enumerate(sprite_byte_list):
-                        self.DISPLAY[Vy%h+sprite_byte_index, Vx%w:Vx%w+8] ^= np.where(np.array(list(("{:8b}".format(sprite_byte)))) == '1', True, False)
-                print_sprites(sprite_byte_list, Vx, Vy)
-                # Wrap around if necessary
-                if (h - Vy%h) < n:
-                    mm = n - (h - Vy%h)
-                    wrap_spr_h_list = sprite_byte_list[mm:]
-                    print_sprites(wrap_spr_h_list, Vx, 0)
-                if (w - Vx%w) < sprite_w:
-                    ii = w - Vx%w
-                    wrap_spr_w_list = [( (sb << ii) & 0xFF ) for sb in sprite_byte_list]
-                    print_sprites(wrap_spr_w_list, 0, Vy)
-                # Determine if any pixel was erased
-                if (DISPLAY_OLD[:self.disp_h_px, :self.disp_w_px] & ~self.DISPLAY[:self.disp_h_px, :self.disp_w_px]).flatten().any():
-                    self.V[0xF] = 1
-                
-                ### Debug DISPLAY
-                ### =============
-                # print()
-                # for row in self.DISPLAY[:self.disp_h_px, :self.disp_w_px]:
-                    # # import pdb; pdb.set_trace()
-                    # print("".join(row.astype(int).astype(str)))
-                # time.sleep(0.04)
-                
-            elif ( n3 == 0xE ) and ( kk == 0x9E ):
-                """
-                Ex9E - SKP Vx
-                Skip next instruction if key with the value of Vx is pressed.
-
-                Checks the keyboard, and if the key corresponding to the value of Vx is currently in the down position, PC is increased by 2.
-                """
-                if self.KEYS[self.V[x]]:
-                    self.PC += 2
-            elif ( n3 == 0xE ) and ( kk == 0xA1 ):
-                """
-                ExA1 - SKNP Vx
-                Skip next instruction if key with the value of Vx is not pressed.
-
-                Checks the keyboard, and if the key corresponding to the value of Vx is currently in the up position, PC is increased by 2.
-                """
-                if not self.KEYS[self.V[x]]:
-                    self.PC += 2
-            elif ( n3 == 0xF ) and ( kk == 0x07 ):
-                """
-                Fx07 - LD Vx, DT
-                Set Vx = delay timer value.
-
-                The value of DT is placed into Vx.
-                """
-                self.V[x] = self.DT
-            elif ( n3 == 0xF ) and ( kk == 0x0A ):
-                """
-                Fx0A - LD Vx, K
-                Wait for a key press, store the value of the key in Vx.
-
-                All execution stops until a key is pressed, then the value of that key is stored in Vx.
-                """
-                for k_ in self.KEYS:
-                    if self.KEYS[k_]:
-                        break
-                else:
-                    return
-                self.V[x] = k_
-            elif ( n3 == 0xF ) and ( kk == 0x15 ):
-                """
-                Fx15 - LD DT, Vx
-                Set delay timer = Vx.
-
-                DT is set equal to the value of Vx.
-                """
-                self.DT = self.V[x]
-            elif ( n3 == 0xF ) and ( kk == 0x18 ):
-                """
-                Fx18 - LD ST, Vx
-                Set sound timer = Vx.
-
-                ST is set equal to the value of Vx.
-                """
-                self.ST = self.V[x]
-            elif ( n3 == 0xF ) and ( kk == 0x1E ):
-                """
-                Fx1E - ADD I, Vx
-                Set I = I + Vx.
-
-                The values of I and Vx are added, and the results are stored in I.
-                """
-                self.I += self.V[x]
-            elif ( n3 == 0xF ) and ( kk == 0x33 ):
-                """
-                Fx33 - LD B, Vx
-                Store BCD representation of Vx in memory locations I, I+1, and I+2.
-
-                The interpreter takes the decimal value of Vx,
-                and places the hundreds digit in memory at location in I,
-                the tens digit at location I+1,
-                and the ones digit at location I+2.
-                """
-                self.mem[self.I  ] = self.V[x]//100
-                self.mem[self.I+1] = self.V[x]//10
-                self.mem[self.I+2] = self.V[x]%10
-            elif ( n3 == 0xF ) and ( kk == 0x65 ):
-                """
-                Fx65 - LD Vx, [I]
-                Read registers V0 through Vx from memory starting at location I.
-
-                The interpreter reads values from memory starting at location I into registers V0 through Vx.
-                """
-                for loc in range(x+1):
-                    self.V[loc] = self.mem[self.I + loc]
+            if n3 == 0x0:
+                handler = self.DispatchTable0.get(nnn, self.op_0nnn)
+            elif n3 == 0x8:
+                handler = self.DispatchTable8.get(n, self.op_unknown)
+            elif n3 == 0xE:
+                handler = self.DispatchTableE.get(kk, self.op_unknown)
+            elif n3 == 0xF:
+                handler = self.DispatchTableF.get(kk, self.op_unknown)
             else:
-                ### DEBUG
-                ### =====
-                print("${:04X} {:04X}".format(self.PC, w))
-                print(
-                    "V "+
-                    " ".join(["{:02X}".format(val) for key, val in self.V.items()])+
-                    "  I {:04X}".format(self.I)+
-                    "  DT {:02X}".format(self.DT)
-                )
-                print(        
-                    "S "+
-                    " ".join(["{:04X}".format(add) for add in self.STACK])+
-                    "  SP {:02X}".format(self.SP)
-                )
-                import pdb; pdb.set_trace() 
-            self.PC += 2
+                handler = self.DispatchTable[n3]
+            return (handler, x, y, n, kk, nnn)
+
+        def redecode(self, start, stop):
+            """
+            Decode again the opcodes overlapping mem[start:stop] after it was written.
+            """
+            for addr in range(max(start-1, 0), min(stop, len(self.DecodedMem))):
+                self.DecodedMem[addr] = self.decode(addr)
+
+        ## -------- OPCODES --------------------------------------
+
+        def op_00E0(self, x, y, n, kk, nnn):
+            """
+            00E0 - CLS
+            Clear the display.
+            """
+            for row in range(self.disp_h_px):
+                self.DISPLAY[row] = 0
+
+        def op_0nnn(self, x, y, n, kk, nnn):
+            """
+            0nnn - SYS addr
+            Jump to a machine code routine at nnn.
+
+            This instruction is only used on the old computers on which Chip-8 was originally implemented. It is ignored by modern interpreters.
+            """
+            pass    
+
+        def op_00EE(self, x, y, n, kk, nnn):
+            """
+            00EE - RET
+            Return from a subroutine.
+
+            The interpreter sets the program counter to the address at the top of the stack, then subtracts 1 from the stack pointer.
+            """
+            self.PC = self.STACK[self.SP]
+            self.SP -= 1
+
+        def op_1nnn(self, x, y, n, kk, nnn):
+            """
+            1nnn - JP addr
+            Jump to location nnn.
+            
+            The interpreter sets the program counter to nnn.
+            """
+            self.PC = nnn
+
+        def op_2nnn(self, x, y, n, kk, nnn):
+            """
+            2nnn - CALL addr
+            Call subroutine at nnn.
+
+            The interpreter increments the stack pointer, then puts the current PC on the top of the stack. The PC is then set to nnn.
+            """
+            self.SP += 1
+            self.STACK[self.SP] = self.PC
+            self.PC = nnn
+
+        def op_3xkk(self, x, y, n, kk, nnn):
+            """
+            3xkk - SE Vx, byte
+            Skip next instruction if Vx = kk.
+
+            The interpreter compares register Vx to kk, and if they are equal, increments the program counter by 2.
+            """
+            if self.V[x] == kk:
+                self.PC += 2       
+
+        def op_4xkk(self, x, y, n, kk, nnn):
+            """
+            4xkk - SNE Vx, byte
+            Skip next instruction if Vx != kk.
+
+            The interpreter compares register Vx to kk, and if they are not equal, increments the program counter by 2.
+            """
+            if self.V[x] != kk:
+                self.PC += 2       
+
+        def op_6xkk(self, x, y, n, kk, nnn):
+            """
+            6xkk - LD Vx, byte
+            Set Vx = kk.
+            
+            The interpreter puts the value kk into register Vx.
+            """
+            self.V[x] = kk
+
+        def op_7xkk(self, x, y, n, kk, nnn):
+            """
+            7xkk - ADD Vx, byte
+            Set Vx = Vx + kk.
+
+            Adds the value kk to the value of register Vx, then stores the result in Vx. 
+            """
+            self.V[x] = (self.V[x] + kk) & 0xFF
+
+        def op_8xy0(self, x, y, n, kk, nnn):
+            """
+            8xy0 - LD Vx, Vy
+            Set Vx = Vy.
+
+            Stores the value of register Vy in register Vx.
+            """
+            self.V[x] = self.V[y]
+
+        def op_8xy2(self, x, y, n, kk, nnn):
+            """
+            8xy2 - AND Vx, Vy
+            Set Vx = Vx AND Vy.
+
+            Performs a bitwise AND on the values of Vx and Vy, then stores the result in Vx. A bitwise AND compares the corrseponding bits from two values, and if both bits are 1, then the same bit in the result is also 1. Otherwise, it is 0.
+            """
+            self.V[x] &= self.V[y]
+
+        def op_8xy3(self, x, y, n, kk, nnn):
+            """
+            8xy3 - XOR Vx, Vy
+            Set Vx = Vx XOR Vy.
+
+            Performs a bitwise exclusive OR on the values of Vx and Vy, then stores the result in Vx. An exclusive OR compares the corrseponding bits from two values, and if the bits are not both the same, then the corresponding bit in the result is set to 1. Otherwise, it is 0.
+            """
+            self.V[x] ^= self.V[y]
+
+        def op_8xy4(self, x, y, n, kk, nnn):
+            """
+            8xy4 - ADD Vx, Vy
+            Set Vx = Vx + Vy, set VF = carry.
+
+            The values of Vx and Vy are added together. If the result is greater than 8 bits (i.e., > 255,) VF is set to 1, otherwise 0. Only the lowest 8 bits of the result are kept, and stored in Vx.
+            """
+            V = self.V
+            sum = V[x] + V[y]
+            if sum > 0xFF:
+                V[0xF] = 1
+            else:
+                V[0xF] = 0                
+            V[x] = sum & 0xFF
+
+        def op_8xy5(self, x, y, n, kk, nnn):
+            """
+            8xy5 - SUB Vx, Vy
+            Set Vx = Vx - Vy, set VF = NOT borrow.
+
+            If Vx > Vy, then VF is set to 1, otherwise 0. Then Vy is subtracted from Vx, and the results stored in Vx.
+            """
+            V = self.V
+            if V[x] > V[y]:
+                V[0xF] = 1
+            else:
+                V[0xF] = 0               
+            V[x] = (V[x] - V[y]) & 0xFF
+
+        def op_8xy6(self, x, y, n, kk, nnn):
+            """
+            8xy6 - SHR Vx {, Vy}
+            Set Vx = Vx SHR 1.
+
+            If the least-significant bit of Vx is 1, then VF is set to 1, otherwise 0. Then Vx is divided by 2.
+            """
+            V = self.V
+            if V[x] & 0x1 == 1:
+                V[0xF] = 1
+            else:
+                V[0xF] = 0
+               
+            V[x] >>= 1
+
+        def op_Annn(self, x, y, n, kk, nnn):
+            """
+            Annn - LD I, addr
+            Set I = nnn.
+            
+            The value of register I is set to nnn.
+            """
+            self.I = nnn
+
+        def op_Cxkk(self, x, y, n, kk, nnn):
+            """
+            Cxkk - RND Vx, byte
+            Set Vx = random byte AND kk.
+
+            The interpreter generates a random number from 0 to 255,
+            which is then ANDed with the value kk.
+            The results are stored in Vx.
+            See instruction 8xy2 for more information on AND.
+            """
+            rr = random.getrandbits(8)
+            self.V[x] = rr & kk
+
+        def op_Dxyn(self, x, y, n, kk, nnn):
+            """
+            Dxyn - DRW Vx, Vy, nibble
+            Display n-byte sprite starting at memory location I at (Vx, Vy), set VF = collision.
+
+            The interpreter reads n bytes from memory, starting at the address stored in I.
+            These bytes are then displayed as sprites on screen at coordinates (Vx, Vy).
+            Sprites are XORed onto the existing screen. If this causes any pixels to be erased, VF is set to 1, otherwise it is set to 0.
+            If the sprite is positioned so part of it is outside the coordinates of the display, it wraps around to the opposite side of the screen.
+            See instruction 8xy3 for more information on XOR, and section 2.4, Display, for more information on the Chip-8 screen and sprites.
+            """
+            V = self.V
+            DISPLAY = self.DISPLAY
+            masks = SPRITE_MASKS[V[x] & 0x3F]
+            Vy = V[y]
+            collision = 0
+            for sprite_byte_index, sprite_byte in enumerate(self.mem[self.I:self.I+n]):
+                mask = masks[sprite_byte]
+                row = (Vy + sprite_byte_index) & 0x1F
+                # remember if any pixel is erased
+                collision |= DISPLAY[row] & mask
+                DISPLAY[row] ^= mask
+            V[0xF] = 1 if collision else 0
+            
+            ### Debug DISPLAY
+            ### =============
+            # print()
+            # for row in self.DISPLAY:
+                # print("{:064b}".format(row))
+            # time.sleep(0.04)
+
+        def op_Ex9E(self, x, y, n, kk, nnn):
+            """
+            Ex9E - SKP Vx
+            Skip next instruction if key with the value of Vx is pressed.
+
+            Checks the keyboard, and if the key corresponding to the value of Vx is currently in the down position, PC is increased by 2.
+            """
+            if self.KEYS[self.V[x]]:
+                self.PC += 2
+
+        def op_ExA1(self, x, y, n, kk, nnn):
+            """
+            ExA1 - SKNP Vx
+            Skip next instruction if key with the value of Vx is not pressed.
+
+            Checks the keyboard, and if the key corresponding to the value of Vx is currently in the up position, PC is increased by 2.
+            """
+            if not self.KEYS[self.V[x]]:
+                self.PC += 2
+
+        def op_Fx07(self, x, y, n, kk, nnn):
+            """
+            Fx07 - LD Vx, DT
+            Set Vx = delay timer value.
+
+            The value of DT is placed into Vx.
+            """
+            self.V[x] = self.DT
+
+        def op_Fx0A(self, x, y, n, kk, nnn):
+            """
+            Fx0A - LD Vx, K
+            Wait for a key press, store the value of the key in Vx.
+
+            All execution stops until a key is pressed, then the value of that key is stored in Vx.
+            """
+            if not any(self.KEYS):
+                # execute this instruction again on the next cycle
+                self.PC -= 2
+                return
+            self.V[x] = self.KEYS.index(1)
+
+        def op_Fx15(self, x, y, n, kk, nnn):
+            """
+            Fx15 - LD DT, Vx
+            Set delay timer = Vx.
+
+            DT is set equal to the value of Vx.
+            """
+            self.DT = self.V[x]
+
+        def op_Fx18(self, x, y, n, kk, nnn):
+            """
+            Fx18 - LD ST, Vx
+            Set sound timer = Vx.
+
+            ST is set equal to the value of Vx.
+            """
+            self.ST = self.V[x]
+
+        def op_Fx1E(self, x, y, n, kk, nnn):
+            """
+            Fx1E - ADD I, Vx
+            Set I = I + Vx.
+
+            The values of I and Vx are added, and the results are stored in I.
+            """
+            self.I += self.V[x]
+
+        def op_Fx33(self, x, y, n, kk, nnn):
+            """
+            Fx33 - LD B, Vx
+            Store BCD representation of Vx in memory locations I, I+1, and I+2.
+
+            The interpreter takes the decimal value of Vx,
+            and places the hundreds digit in memory at location in I,
+            the tens digit at location I+1,
+            and the ones digit at location I+2.
+            """
+            I = self.I
+            hundreds, rest = divmod(self.V[x], 100)
+            tens, ones = divmod(rest, 10)
+            self.mem[I  ] = hundreds
+            self.mem[I+1] = tens
+            self.mem[I+2] = ones
+            self.redecode(I, I+3)
+
+        def op_Fx65(self, x, y, n, kk, nnn):
+            """
+            Fx65 - LD Vx, [I]
+            Read registers V0 through Vx from memory starting at location I.
+
+            The interpreter reads values from memory starting at location I into registers V0 through Vx.
+            """
+            V = self.V
+            mem = self.mem
+            I = self.I
+            for loc in range(x+1):
+                V[loc] = mem[I + loc]
+
+        def op_unknown(self, x, y, n, kk, nnn):
+        
+            ### DEBUG
+            ### =====
+            w = (self.mem[self.PC-2] << 8) + self.mem[self.PC-1]
+            print("${:04X} {:04X}".format(self.PC-2, w))
+            print(
+                "V "+
+                " ".join(["{:02X}".format(val) for val in self.V])+
+                "  I {:04X}".format(self.I)+
+                "  DT {:02X}".format(self.DT)
+            )
+            print(        
+                "S "+
+                " ".join(["{:04X}".format(add) for add in self.STACK])+
+                "  SP {:02X}".format(self.SP)
+            )
+            import pdb; pdb.set_trace() 
 
         def decrement_DT_ST(self):
         
@@ -476,30 +792,14 @@ try:
                 
             if self.ST > 0:
                 if not self.bBeepPlaying:
-                    beep.play(loops = -1)
+                    self.BeepChannel.unpause()
                     self.bBeepPlaying = True
                 self.ST -= 1
             else:
                 if self.bBeepPlaying:
-                    beep.stop()
+                    self.BeepChannel.pause()
                     self.bBeepPlaying = False
                 self.ST = 0x00
-        
-        def startAllThreads(self):
-            self.EmulationThread.start()
-            self.DtStThread.start()
-        
-        def abortAllThreads(self):
-            self.bEmulationThreadAbortQueue.put(True)
-            self.bDtStThreadAbortQueue.put(True)
-        
-        def joinAllThreads(self):
-            self.EmulationThread.join()
-            self.DtStThread.join()
-        
-        def stopAllThreads(self):
-            self.abortAllThreads()
-            self.joinAllThreads()
             
     ThisFolder = os.path.dirname(os.path.realpath(__file__))
     # RomPath = os.path.join(ThisFolder, r"roms\INVADERS")
@@ -517,19 +817,46 @@ try:
 
     pygame.init()
     screen = pygame.display.set_mode((screen_width, screen_height))
-    background = pygame.Surface(screen.get_size())
-    background = background.convert()
+    # the display is drawn at its native resolution, then scaled to the screen
+    display_surface = pygame.Surface((chip8.disp_w_px, chip8.disp_h_px)).convert()
+    display_colours = np.array([
+        display_surface.map_rgb(BLACK_COLOUR),
+        display_surface.map_rgb(WHITE_COLOUR),
+    ], dtype = np.uint32)
     clock = pygame.time.Clock()
     FPS = 20
+    ClockFrequency = 100000
     bPlaying = True
 
+    #======================
+    # FRENCH
+    #======================
+    
+    # KEYMAP = {
+        # "&": 0x1, "é": 0x2, '"': 0x3, "'": 0xC,
+        # "a": 0x4, "z": 0x5, "e": 0x6, "r": 0xD,
+        # "q": 0x7, "s": 0x8, "d": 0x9, "f": 0xE,
+        # "w": 0xA, "x": 0x0, "c": 0xB, "v": 0xF,
+    # }
+    
+    #======================
+    # EN-US
+    #======================
+    
+    KEYMAP = {
+        "1": 0x1, "2": 0x2, "3": 0x3, "4": 0xC,
+        "q": 0x4, "w": 0x5, "e": 0x6, "r": 0xD,
+        "a": 0x7, "s": 0x8, "d": 0x9, "f": 0xE,
+        "z": 0xA, "x": 0x0, "c": 0xB, "v": 0xF,
+    }
+    
+    # CHIP-8 key of each pressed scancode
     keymap = {}
 
     MaxTime = 0
     AverageTime = 0
     CycleCount = 0
 
-    chip8.startAllThreads()
     while bPlaying:
         
         milliseconds = clock.tick(FPS)  # milliseconds passed since last frame
@@ -538,107 +865,25 @@ try:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 bPlaying = False # pygame window closed by user
-                chip8.stopAllThreads()
             elif event.type == pygame.KEYDOWN:          
                 # print(event.unicode+" DOWN")
-                keymap[event.scancode] = event.unicode
-                
-                #======================
-                # FRENCH
-                #======================
-                
-                # if   event.unicode == "&": chip8.KEYS[0x1] = True
-                # elif event.unicode == "é": chip8.KEYS[0x2] = True
-                # elif event.unicode == '"': chip8.KEYS[0x3] = True
-                # elif event.unicode == "'": chip8.KEYS[0xC] = True
-                # elif event.unicode == "a": chip8.KEYS[0x4] = True
-                # elif event.unicode == "z": chip8.KEYS[0x5] = True
-                # elif event.unicode == "e": chip8.KEYS[0x6] = True
-                # elif event.unicode == "r": chip8.KEYS[0xD] = True
-                # elif event.unicode == "q": chip8.KEYS[0x7] = True
-                # elif event.unicode == "s": chip8.KEYS[0x8] = True
-                # elif event.unicode == "d": chip8.KEYS[0x9] = True
-                # elif event.unicode == "f": chip8.KEYS[0xE] = True
-                # elif event.unicode == "w": chip8.KEYS[0xA] = True
-                # elif event.unicode == "x": chip8.KEYS[0x0] = True
-                # elif event.unicode == "c": chip8.KEYS[0xB] = True
-                # elif event.unicode == "v": chip8.KEYS[0xF] = True
-                
-                #======================
-                # EN-US
-                #======================                
-                
-                if   event.unicode == "1": chip8.KEYS[0x1] = True
-                elif event.unicode == "2": chip8.KEYS[0x2] = True
-                elif event.unicode == '3': chip8.KEYS[0x3] = True
-                elif event.unicode == "4": chip8.KEYS[0xC] = True
-                elif event.unicode == "q": chip8.KEYS[0x4] = True
-                elif event.unicode == "w": chip8.KEYS[0x5] = True
-                elif event.unicode == "e": chip8.KEYS[0x6] = True
-                elif event.unicode == "r": chip8.KEYS[0xD] = True
-                elif event.unicode == "a": chip8.KEYS[0x7] = True
-                elif event.unicode == "s": chip8.KEYS[0x8] = True
-                elif event.unicode == "d": chip8.KEYS[0x9] = True
-                elif event.unicode == "f": chip8.KEYS[0xE] = True
-                elif event.unicode == "z": chip8.KEYS[0xA] = True
-                elif event.unicode == "x": chip8.KEYS[0x0] = True
-                elif event.unicode == "c": chip8.KEYS[0xB] = True
-                elif event.unicode == "v": chip8.KEYS[0xF] = True                
+                # KEYUP events carry no unicode, so remember the key by scancode
+                keymap[event.scancode] = KEYMAP.get(event.unicode)
+                if keymap[event.scancode] is not None:
+                    chip8.KEYS[keymap[event.scancode]] = True
             elif event.type == pygame.KEYUP:          
-                event.unicode = keymap[event.scancode]
-                # print(event.unicode+" UP")
-                
-                #======================
-                # FRENCH
-                #======================                
-                
-                # if   event.unicode == "&": chip8.KEYS[0x1] = False
-                # elif event.unicode == "é": chip8.KEYS[0x2] = False
-                # elif event.unicode == '"': chip8.KEYS[0x3] = False
-                # elif event.unicode == "'": chip8.KEYS[0xC] = False
-                # elif event.unicode == "a": chip8.KEYS[0x4] = False
-                # elif event.unicode == "z": chip8.KEYS[0x5] = False
-                # elif event.unicode == "e": chip8.KEYS[0x6] = False
-                # elif event.unicode == "r": chip8.KEYS[0xD] = False
-                # elif event.unicode == "q": chip8.KEYS[0x7] = False
-                # elif event.unicode == "s": chip8.KEYS[0x8] = False
-                # elif event.unicode == "d": chip8.KEYS[0x9] = False
-                # elif event.unicode == "f": chip8.KEYS[0xE] = False
-                # elif event.unicode == "w": chip8.KEYS[0xA] = False
-                # elif event.unicode == "x": chip8.KEYS[0x0] = False
-                # elif event.unicode == "c": chip8.KEYS[0xB] = False
-                # elif event.unicode == "v": chip8.KEYS[0xF] = False
-
-                #======================
-                # EN-US
-                #====================== 
-                
-                if   event.unicode == "1": chip8.KEYS[0x1] = False
-                elif event.unicode == "2": chip8.KEYS[0x2] = False
-                elif event.unicode == '3': chip8.KEYS[0x3] = False
-                elif event.unicode == "4": chip8.KEYS[0xC] = False
-                elif event.unicode == "q": chip8.KEYS[0x4] = False
-                elif event.unicode == "w": chip8.KEYS[0x5] = False
-                elif event.unicode == "e": chip8.KEYS[0x6] = False
-                elif event.unicode == "r": chip8.KEYS[0xD] = False
-                elif event.unicode == "a": chip8.KEYS[0x7] = False
-                elif event.unicode == "s": chip8.KEYS[0x8] = False
-                elif event.unicode == "d": chip8.KEYS[0x9] = False
-                elif event.unicode == "f": chip8.KEYS[0xE] = False
-                elif event.unicode == "z": chip8.KEYS[0xA] = False
-                elif event.unicode == "x": chip8.KEYS[0x0] = False
-                elif event.unicode == "c": chip8.KEYS[0xB] = False
-                elif event.unicode == "v": chip8.KEYS[0xF] = False                
-        background.fill(BLACK_COLOUR)
-        for py, pixel_row in enumerate(chip8.DISPLAY[:chip8.disp_h_px, :chip8.disp_w_px]):
-            for px, pixel_state in enumerate(pixel_row):
-                if pixel_state:
-                    pygame.draw.rect(
-                        background,
-                        WHITE_COLOUR,
-                        (zoom*px, zoom*py, zoom, zoom),
-                    )
-        screen.blit(background, (0, 0))
+                key = keymap.get(event.scancode)
+                if key is not None:
+                    chip8.KEYS[key] = False
+        chip8.updateTimers(milliseconds)
+        chip8.runCycles(ClockFrequency // FPS)
+        
+        # unpack the display rows into one pixel per byte, indexed [py, px]
+        pixels = np.unpackbits(
+            np.array(chip8.DISPLAY, dtype = '>u8').view(np.uint8)
+        ).reshape(chip8.disp_h_px, chip8.disp_w_px)
+        pygame.surfarray.blit_array(display_surface, display_colours[pixels.T])
+        pygame.transform.scale(display_surface, (screen_width, screen_height), screen)
         pygame.display.flip()
 
 ## -------- SOMETHING WENT WRONG -----------------------------	
@@ -0,0 +1,286 @@
+/*
+	CHIP-8 Emulator - native core
+
+	Native equivalent of Chip8.emulateCycle, loaded by chip8.py with ctypes.
+	Build it with setup\core_build.bat.
+
+	Reference:
+	http://devernay.free.fr/hacks/chip8/C8TECH10.HTM
+*/
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <time.h>
+
+#ifdef _WIN32
+#define EXPORT __declspec(dllexport)
+#else
+#define EXPORT
+#endif
+
+#define MEM_SIZE 0x1000
+
+/*
+	Run NumberOfCycles cycles.
+
+	The arrays share their memory with the Chip8 attributes of the same name,
+	state holds [PC, I, SP, DT, ST] and is updated in place.
+	Returns 0 if an unknown opcode stopped the execution, with PC right after it, 1 otherwise.
+*/
+EXPORT int chip8_run(
+	uint8_t *mem,
+	uint8_t *V,
+	uint16_t *STACK,
+	uint64_t *DISPLAY,
+	const uint8_t *KEYS,
+	int64_t *state,
+	int64_t NumberOfCycles
+)
+{
+	static int bRandomSeeded = 0;
+
+	int64_t PC = state[0];
+	int64_t I = state[1];
+	int64_t SP = state[2];
+	int64_t DT = state[3];
+	int64_t ST = state[4];
+	int bKnownOpcodes = 1;
+
+	unsigned w, n3, x, y, n, kk, nnn;
+
+#ifdef __GNUC__
+	/* direct threaded dispatch on the most significant nibble */
+	static void *DispatchTable[16] = {
+		&&op_0, &&op_1, &&op_2, &&op_3,
+		&&op_4, &&op_unknown, &&op_6, &&op_7,
+		&&op_8, &&op_unknown, &&op_A, &&op_unknown,
+		&&op_C, &&op_D, &&op_E, &&op_F,
+	};
+#endif
+
+	if (!bRandomSeeded) {
+		srand((unsigned)time(NULL));
+		bRandomSeeded = 1;
+	}
+
+	for (int64_t cycle = 0; cycle < NumberOfCycles; cycle++) {
+
+		if (PC < 0 || PC >= MEM_SIZE - 1)
+			goto op_unknown;
+
+		w = ((unsigned)mem[PC] << 8) + mem[PC+1];
+
+		n3 = (w & 0xF000) >> 12;
+		x = (w & 0x0F00) >> 8;
+		y = (w & 0x00F0) >> 4;
+		n = w & 0x000F;
+		kk = w & 0x00FF;
+		nnn = w & 0x0FFF;
+
+		/* PC points to the next instruction while the opcode executes */
+		PC += 2;
+
+#ifdef __GNUC__
+		goto *DispatchTable[n3];
+#else
+		switch (n3) {
+			case 0x0: goto op_0;
+			case 0x1: goto op_1;
+			case 0x2: goto op_2;
+			case 0x3: goto op_3;
+			case 0x4: goto op_4;
+			case 0x6: goto op_6;
+			case 0x7: goto op_7;
+			case 0x8: goto op_8;
+			case 0xA: goto op_A;
+			case 0xC: goto op_C;
+			case 0xD: goto op_D;
+			case 0xE: goto op_E;
+			case 0xF: goto op_F;
+			default: goto op_unknown;
+		}
+#endif
+
+	op_0:
+		if (nnn == 0x0E0) {
+			/* 00E0 - CLS */
+			for (int row = 0; row < 32; row++)
+				DISPLAY[row] = 0;
+		} else if (nnn == 0x0EE) {
+			/* 00EE - RET */
+			PC = STACK[SP & 0xF];
+			SP -= 1;
+		}
+		/* 0nnn - SYS addr is ignored */
+		continue;
+
+	op_1:
+		/* 1nnn - JP addr */
+		PC = nnn;
+		continue;
+
+	op_2:
+		/* 2nnn - CALL addr */
+		SP += 1;
+		STACK[SP & 0xF] = (uint16_t)PC;
+		PC = nnn;
+		continue;
+
+	op_3:
+		/* 3xkk - SE Vx, byte */
+		if (V[x] == kk)
+			PC += 2;
+		continue;
+
+	op_4:
+		/* 4xkk - SNE Vx, byte */
+		if (V[x] != kk)
+			PC += 2;
+		continue;
+
+	op_6:
+		/* 6xkk - LD Vx, byte */
+		V[x] = kk;
+		continue;
+
+	op_7:
+		/* 7xkk - ADD Vx, byte */
+		V[x] = (V[x] + kk) & 0xFF;
+		continue;
+
+	op_8:
+		switch (n) {
+			case 0x0:
+				/* 8xy0 - LD Vx, Vy */
+				V[x] = V[y];
+				continue;
+			case 0x2:
+				/* 8xy2 - AND Vx, Vy */
+				V[x] &= V[y];
+				continue;
+			case 0x3:
+				/* 8xy3 - XOR Vx, Vy */
+				V[x] ^= V[y];
+				continue;
+			case 0x4: {
+				/* 8xy4 - ADD Vx, Vy */
+				unsigned sum = V[x] + V[y];
+				V[0xF] = sum > 0xFF;
+				V[x] = sum & 0xFF;
+				continue;
+			}
+			case 0x5:
+				/* 8xy5 - SUB Vx, Vy */
+				V[0xF] = V[x] > V[y];
+				V[x] = (V[x] - V[y]) & 0xFF;
+				continue;
+			case 0x6:
+				/* 8xy6 - SHR Vx {, Vy} */
+				V[0xF] = V[x] & 0x1;
+				V[x] >>= 1;
+				continue;
+		}
+		goto op_unknown;
+
+	op_A:
+		/* Annn - LD I, addr */
+		I = nnn;
+		continue;
+
+	op_C:
+		/* Cxkk - RND Vx, byte */
+		V[x] = (rand() & 0xFF) & kk;
+		continue;
+
+	op_D: {
+		/* Dxyn - DRW Vx, Vy, nibble */
+		unsigned Vx = V[x] & 0x3F;
+		unsigned Vy = V[y];
+		uint64_t collision = 0;
+		for (unsigned sprite_byte_index = 0; sprite_byte_index < n; sprite_byte_index++) {
+			if (I + sprite_byte_index >= MEM_SIZE)
+				break;
+			/* rotate the sprite byte right from the leftmost pixels, wrapping around */
+			uint64_t mask = (uint64_t)mem[I + sprite_byte_index] << 56;
+			if (Vx)
+				mask = (mask >> Vx) | (mask << (64 - Vx));
+			unsigned row = (Vy + sprite_byte_index) & 0x1F;
+			/* remember if any pixel is erased */
+			collision |= DISPLAY[row] & mask;
+			DISPLAY[row] ^= mask;
+		}
+		V[0xF] = collision ? 1 : 0;
+		continue;
+	}
+
+	op_E:
+		if (kk == 0x9E) {
+			/* Ex9E - SKP Vx */
+			if (KEYS[V[x] & 0xF])
+				PC += 2;
+			continue;
+		} else if (kk == 0xA1) {
+			/* ExA1 - SKNP Vx */
+			if (!KEYS[V[x] & 0xF])
+				PC += 2;
+			continue;
+		}
+		goto op_unknown;
+
+	op_F:
+		switch (kk) {
+			case 0x07:
+				/* Fx07 - LD Vx, DT */
+				V[x] = (uint8_t)DT;
+				continue;
+			case 0x0A: {
+				/* Fx0A - LD Vx, K */
+				for (unsigned k_ = 0; k_ < 16; k_++) {
+					if (KEYS[k_]) {
+						V[x] = k_;
+						goto key_pressed;
+					}
+				}
+				/* execute this instruction again on the next cycle */
+				PC -= 2;
+			key_pressed:
+				continue;
+			}
+			case 0x15:
+				/* Fx15 - LD DT, Vx */
+				DT = V[x];
+				continue;
+			case 0x18:
+				/* Fx18 - LD ST, Vx */
+				ST = V[x];
+				continue;
+			case 0x1E:
+				/* Fx1E - ADD I, Vx */
+				I += V[x];
+				continue;
+			case 0x33:
+				/* Fx33 - LD B, Vx */
+				mem[(I  ) & 0xFFF] = V[x] / 100;
+				mem[(I+1) & 0xFFF] = (V[x] / 10) % 10;
+				mem[(I+2) & 0xFFF] = V[x] % 10;
+				continue;
+			case 0x65:
+				/* Fx65 - LD Vx, [I] */
+				for (unsigned loc = 0; loc <= x; loc++)
+					V[loc] = mem[(I + loc) & 0xFFF];
+				continue;
+		}
+		goto op_unknown;
+
+	op_unknown:
+		bKnownOpcodes = 0;
+		break;
+	}
+
+	state[0] = PC;
+	state[1] = I;
+	state[2] = SP;
+	state[3] = DT;
+	state[4] = ST;
+	return bKnownOpcodes;
+}
@@ -0,0 +1,7 @@
+@echo off
+REM - This script builds the optional native core chip8\chip8_core.dll, which requires gcc (e.g. MinGW-w64)
+REM - Without it, the emulator falls back to numba, then to plain Python
+
+@echo on
+echo Please wait while the native core is built ...
+gcc -O2 -shared -o %~dp0\..\chip8\chip8_core.dll %~dp0\..\chip8\chip8_core.c